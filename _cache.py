@@ -0,0 +1,149 @@
+"""
+Response cache for the agents' DSPy programs.
+
+`cached_predict(SignatureClass)` wraps a program (dspy.Predict / dspy.ChainOfThought)
+so that calling it with the same inputs, against the same model and LM settings,
+returns the stored output fields instead of hitting the LM again.
+Fresh outputs are not stored by the wrapper: the caller validates them first and
+then calls `store_validated(pred)`, so an invalid output is never served again.
+
+Two levels:
+- an in-process LRU (up to 1024 entries)
+- an on-disk cache shared across runs (~/.smartwod_cache)
+
+Keys are a blake2b digest of the signature name, the program (its type, the config
+of each predictor and its dumped state: demos, instructions, ...), the canonicalized
+inputs (json.dumps with sorted keys), the LM model name and its kwargs (temperature, ...;
+credentials such as api_key are left out).
+The program part is read on every call, so loading or compiling a program changes
+its keys instead of serving outputs of the previous version.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+import hashlib
+import json
+import os
+import threading
+import diskcache
+import dspy
+
+
+CACHE_DIR: str = os.path.expanduser("~/.smartwod_cache")
+MEMORY_CACHE_SIZE: int = 1024
+
+_memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_memory_lock = threading.Lock()
+_disk: diskcache.Cache | None = None
+
+
+def _disk_cache() -> diskcache.Cache:
+	global _disk
+	if _disk is None:
+		_disk = diskcache.Cache(CACHE_DIR)
+	return _disk
+
+
+def _program_fingerprint(program: Callable[..., dspy.Prediction]) -> Dict[str, Any]:
+	fingerprint: Dict[str, Any] = {"type": type(program).__name__}
+	if isinstance(program, dspy.Module):
+		fingerprint["config"] = [predictor.config for predictor in program.predictors()]
+		fingerprint["state"] = program.dump_state()
+	return fingerprint
+
+
+# LM kwargs that are credentials/endpoint settings rather than generation settings.
+# They are left out of the key, so e.g. rotating the API key keeps the cache.
+_CREDENTIAL_KWARGS = frozenset({"api_key", "api_base", "base_url", "api_version", "organization", "azure_ad_token"})
+
+
+def _key_lm_kwargs(lm: Any) -> Dict[str, Any] | None:
+	kwargs = getattr(lm, "kwargs", None)
+	if not isinstance(kwargs, dict):
+		return kwargs
+	return {k: v for k, v in kwargs.items() if k not in _CREDENTIAL_KWARGS}
+
+
+def _cache_key(signature_name: str, program: Callable[..., dspy.Prediction], inputs: Dict[str, Any]) -> str:
+	lm = dspy.settings.lm
+	payload = json.dumps(
+		{
+			"signature": signature_name,
+			"program": _program_fingerprint(program),
+			"inputs": inputs,
+			"model": getattr(lm, "model", None),
+			"lm_kwargs": _key_lm_kwargs(lm),
+		},
+		sort_keys=True,
+		default=str,
+	)
+	return hashlib.blake2b(payload.encode("utf-8"), digest_size=32).hexdigest()
+
+
+def _memory_get(key: str) -> Dict[str, Any] | None:
+	with _memory_lock:
+		fields = _memory.get(key)
+		if fields is not None:
+			_memory.move_to_end(key)
+		return fields
+
+
+def _memory_put(key: str, fields: Dict[str, Any]) -> None:
+	with _memory_lock:
+		_memory[key] = fields
+		_memory.move_to_end(key)
+		if len(_memory) > MEMORY_CACHE_SIZE:
+			_memory.popitem(last=False)
+
+
+def cached_predict(signature_cls: type) -> Callable[[Callable[..., dspy.Prediction]], Callable[..., dspy.Prediction]]:
+	"""
+	Decorator factory: `cached_predict(Sig)(program)` returns a callable with the
+	same keyword interface as `program` that short-circuits on cache hits.
+	On a miss the program's prediction is returned tagged with its cache key; it is
+	only stored once passed to store_validated(). The wrapped program is kept in
+	`__wrapped__`.
+	"""
+	signature_name = signature_cls.__name__
+
+	def decorator(program: Callable[..., dspy.Prediction]) -> Callable[..., dspy.Prediction]:
+		def wrapper(**inputs: Any) -> dspy.Prediction:
+			key = _cache_key(signature_name, program, inputs)
+
+			fields = _memory_get(key)
+			if fields is None:
+				fields = _disk_cache().get(key)
+				if fields is not None:
+					_memory_put(key, fields)
+			if fields is not None:
+				return dspy.Prediction(**fields)
+
+			pred = program(**inputs)
+			pred._cache_key = key
+			return pred
+
+		wrapper.__wrapped__ = program
+		return wrapper
+
+	return decorator
+
+
+def store_validated(pred: dspy.Prediction) -> None:
+	"""
+	Stores a prediction returned by a cached_predict() wrapper once its output passed
+	validation. Cache hits and predictions from unwrapped programs carry no key and
+	are ignored.
+	"""
+	key = getattr(pred, "_cache_key", None)
+	if key is None:
+		return
+	fields = dict(pred.items())
+	_memory_put(key, fields)
+	_disk_cache().set(key, fields)
+
+
+def clear_cache() -> None:
+	"""Drop both the in-process and the on-disk entries."""
+	with _memory_lock:
+		_memory.clear()
+	_disk_cache().clear()
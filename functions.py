@@ -2,43 +2,286 @@
 Unified DSPy agents and signatures for the Smart WOD workflow.
 
 This file intentionally merges:
-- _parse_json_dict() helper function
-- UserIntentSignature, WODArchitectSignature, ScalingInjurySignature, PerformanceOptimizerSignature
-- UserIntentAgent, WODArchitect, ScalingInjurySpecialist, PerformanceOptimizer
+- JSON helpers (_parse_model(), _parse_json_batch()) and IncrementalJsonParser
+- Pydantic data contracts for each agent's output (IntentModel, WODModel, ...)
+- UserIntentSignature, WODArchitectSignature, ScalingInjurySignature, AccessoryGoalsSignature, MergeSignature
+- Batch* variants of each signature, used by the agents' forward_batch()
+- UserIntentAgent, WODArchitect, ScalingInjurySpecialist, AccessoryPlanner, PerformanceOptimizer
 
 into a single module.
+
+Output token budgets (max_tokens) per stage, to cap generation latency:
+- User Intent Agent: 128
+- WOD Architect: 512
+- Scaling & Injury Specialist: 768
+- Accessory Planner: 512
+- Performance Optimizer (warm-up/cool-down): 384
+Batch calls get the per-item budget times the batch size, and ChainOfThought
+(debug mode) gets an extra 256 tokens for the reasoning field.
 """
 
-from typing import Any, Dict, List
-import json
-import sys
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+import logging
 import dspy
+import orjson
+from dspy.utils.exceptions import AdapterParseError
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from _cache import cached_predict, store_validated
+
+
+logger = logging.getLogger("smartwod")
+
+
+def _dumps(obj: Any) -> str:
+	"""Compact JSON serialization (orjson) as str, used for the agents' LM inputs."""
+	return orjson.dumps(obj).decode()
+
+
+_loads = orjson.loads
 
 
-def _parse_json_dict(raw: str) -> Dict[str, Any] | None:
+def _lm_input(obj: Dict[str, Any]) -> Dict[str, Any] | str:
 	"""
-	Best-effort helper to parse a JSON string into a dict.
-	Returns None if parsing fails or the result is not a dict.
-	Prints a short warning when parsing fails.
+	Prepares a dict for a DSPy input field. DSPy's chat/JSON adapters already render
+	dict inputs as a JSON block, so the dict is passed as-is instead of serializing it
+	twice; other adapters get the JSON string.
+	"""
+	adapter = dspy.settings.adapter
+	if adapter is None or isinstance(adapter, dspy.ChatAdapter):
+		return obj
+	return _dumps(obj)
+
+
+def _goals_input(goals: str | List[str]) -> str:
+	"""User goals as the text of a `goals` input field: lists as JSON, anything else as str."""
+	return _dumps(goals) if isinstance(goals, list) else str(goals)
+
+
+def _field(pred: Any, name: str) -> str:
+	"""Reads an output field as str, without copying it when it already is one."""
+	value = getattr(pred, name, "")
+	return value if isinstance(value, str) else str(value)
+
+
+def _parse_model(model: type[BaseModel], raw: str) -> Dict[str, Any]:
+	"""
+	Validates an agent's raw LM output against its data contract and returns it as a
+	dict (only the fields the LM produced). Raises pydantic.ValidationError on a
+	contract violation instead of passing a malformed payload to the next stage;
+	the caller (_predict_validated) logs it.
+	"""
+	return model.model_validate_json(raw).model_dump(exclude_unset=True)
+
+
+def _parse_json_batch(raw: str, size: int, model: type[BaseModel]) -> List[Dict[str, Any]]:
+	"""
+	Parses a batched LM output: a JSON array of objects, each carrying its input
+	index in "i". Each object is validated against `model` and the results are
+	returned aligned by index ("i" removed).
+	Raises ValueError (pydantic.ValidationError included) if the output is not an
+	array, an item violates the contract, or an index is missing.
 	"""
 	try:
-		val = json.loads(raw)
-		if isinstance(val, dict):
-			return val
-		# if parsed but not a dict
-		print(
-			"[WARN] _parse_json_dict: JSON parsed but is not an object; "
-			"expected a dict. Truncating preview: "
-			f"{str(val)[:200]!r}",
-			file=sys.stderr,
-		)
-	except Exception as e:
-		print(
-			"[WARN] _parse_json_dict: failed to parse JSON; "
-			f"{type(e).__name__}: {e}. Raw preview: {raw[:200]!r}",
-			file=sys.stderr,
+		return _validate_batch(_loads(raw), size, model)
+	except ValueError as e:
+		logger.warning("_parse_json_batch: %s: %s; raw=%.200r", type(e).__name__, e, raw)
+		raise
+
+
+def _validate_batch(val: Any, size: int, model: type[BaseModel]) -> List[Dict[str, Any]]:
+	if not isinstance(val, list):
+		raise ValueError(f"expected a JSON array of {size} results, got {type(val).__name__}")
+
+	results: List[Dict[str, Any] | None] = [None] * size
+	for item in val:
+		if not isinstance(item, dict):
+			raise ValueError(f"expected JSON objects in the batch array, got {type(item).__name__}")
+		idx = item.pop("i", None)
+		if isinstance(idx, int) and 0 <= idx < size:
+			results[idx] = model.model_validate(item).model_dump(exclude_unset=True)
+
+	missing = [i for i, item in enumerate(results) if item is None]
+	if missing:
+		raise ValueError(f"missing batch results for indices {missing}")
+	return results
+
+
+RETRY_TEMPERATURE: float = 0.3
+
+
+class StageOutputError(ValueError):
+	"""An agent's LM output still violated its data contract after one retry."""
+
+	def __init__(self, stage: str, raw: str):
+		super().__init__(f"{stage}: LM output violates its data contract after a retry")
+		self.stage = stage
+		self.raw = raw
+
+
+def _predict_validated(
+	stage: str,
+	program: Callable[..., dspy.Prediction],
+	field: str,
+	model: type[BaseModel],
+	lm: dspy.LM | None,
+	inputs: Dict[str, Any],
+) -> Tuple[dspy.Prediction, str, Dict[str, Any]]:
+	"""
+	Calls `program` under `lm` (or the configured LM) and validates the output `field`
+	against `model`; only a valid output is written to the response cache. On a
+	contract violation (or output DSPy's adapter cannot parse) the call is retried
+	once at RETRY_TEMPERATURE, bypassing both the response cache and DSPy's LM
+	cache; if that output is also invalid, raises StageOutputError so the pipeline
+	stops here instead of spending the next stages' LM calls on it.
+	Returns (prediction, raw field text, validated dict).
+	"""
+	lm = lm or dspy.settings.lm
+	try:
+		with dspy.context(lm=lm):
+			pred = program(**inputs)
+		raw = _field(pred, field)
+		parsed = _parse_model(model, raw)
+	except (AdapterParseError, ValidationError) as e:
+		if isinstance(e, AdapterParseError):
+			raw = e.lm_response
+		logger.warning(
+			"%s: output violates %s (%s); raw=%.200r; retrying once at temperature=%s",
+			stage, model.__name__, type(e).__name__, raw, RETRY_TEMPERATURE,
 		)
-	return None
+	else:
+		store_validated(pred)
+		return pred, raw, parsed
+
+	# The retry calls the program behind cached_predict(), so it neither reads nor stores a cache entry,
+	# and disables DSPy's own LM cache so it gets a fresh sample instead of a stored invalid one
+	retry_program = getattr(program, "__wrapped__", program)
+	try:
+		with dspy.context(lm=lm.copy(temperature=RETRY_TEMPERATURE, cache=False)):
+			pred = retry_program(**inputs)
+		raw = _field(pred, field)
+		return pred, raw, _parse_model(model, raw)
+	except AdapterParseError as e:
+		raise StageOutputError(stage, e.lm_response) from e
+	except ValidationError as e:
+		raise StageOutputError(stage, raw) from e
+
+
+class IncrementalJsonParser:
+	"""
+	Incremental parser for a JSON object that arrives in chunks (e.g. a streamed LM field).
+
+	Tracks nesting depth and string/escape state over the buffered text, and each time a
+	top-level member is complete it parses the object so far (closed with "}") so callers
+	can render e.g. {"warmup": {...}} before "cooldown" has been generated.
+	Text before the first "{" (such as a ```json fence) is skipped.
+	"""
+
+	def __init__(self):
+		self._buf: List[str] = []
+		self._start = -1  # index of the opening "{" in the buffer
+		self._depth = 0
+		self._in_string = False
+		self._escape = False
+		self.done = False
+		self.value: Dict[str, Any] | None = None
+
+	def feed(self, chunk: str) -> Dict[str, Any] | None:
+		"""
+		Consumes a chunk. Returns a new snapshot of the parsed object when at least one
+		more top-level member was completed by this chunk, otherwise None.
+		"""
+		if self.done:
+			return None
+
+		offset = len(self._buf)
+		self._buf.extend(chunk)
+		snapshot_end = -1
+
+		for i in range(offset, len(self._buf)):
+			ch = self._buf[i]
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+			elif self._start < 0:
+				if ch == "{":
+					self._start = i
+					self._depth = 1
+			elif ch == '"':
+				self._in_string = True
+			elif ch in "{[":
+				self._depth += 1
+			elif ch in "}]":
+				self._depth -= 1
+				if self._depth == 0:
+					self.done = True
+					snapshot_end = i
+					break
+			elif ch == "," and self._depth == 1:
+				snapshot_end = i
+
+		if snapshot_end < 0:
+			return None
+
+		text = "".join(self._buf[self._start:snapshot_end])
+		try:
+			val = _loads(text + "}")
+		except orjson.JSONDecodeError:
+			return None
+		if not isinstance(val, dict):
+			return None
+		self.value = val
+		return val
+
+
+# =========================
+# Data contracts
+# =========================
+# Outputs are validated against these models before being handed to the next stage.
+# Only the fields the next stages rely on are required; extra fields are kept.
+
+
+class _Contract(BaseModel):
+	model_config = ConfigDict(extra="allow")
+
+
+class IntentModel(_Contract):
+	type: str
+	duration: Any = None
+	style: Any = None
+
+
+class MovementModel(_Contract):
+	exercise: str
+
+
+class WODModel(_Contract):
+	name: str
+	type: str
+	movements: List[MovementModel]
+
+
+class AnnotatedMovementModel(MovementModel):
+	scaled: Any = None
+	rx_plus: Any = None
+	injury_alts: Any = None
+
+
+class AnnotatedWODModel(WODModel):
+	movements: List[AnnotatedMovementModel]
+
+
+class AccessoriesModel(_Contract):
+	accessories: List[Dict[str, Any]]
+
+
+class WarmupCooldownModel(_Contract):
+	warmup: Any
+	cooldown: Any
 
 
 # =========================
@@ -93,8 +336,22 @@ class ScalingInjurySignature(dspy.Signature):
 	)
 
 
-class PerformanceOptimizerSignature(dspy.Signature):
-	"""Provide warm-up, cool-down, and two accessory sessions aligned to user goals."""
+class AccessoryGoalsSignature(dspy.Signature):
+	"""Provide two accessory sessions that complement a base WOD and are aligned to user goals."""
+
+	base_wod_json = dspy.InputField(
+		desc="JSON from WOD Architect: {name, type, movements}.",
+	)
+	goals = dspy.InputField(
+		desc="List of user goals like ['improve cardio', 'build leg strength'] (as JSON string).",
+	)
+	accessories_json = dspy.OutputField(
+		desc="Output only strict JSON: {accessories: [..]} with two sessions, each with name, duration and actionable details.",
+	)
+
+
+class MergeSignature(dspy.Signature):
+	"""Provide a warm-up and cool-down for the annotated WOD, aligned to the user goals. The final plan is assembled from them, the WOD and the accessory sessions."""
 
 	modified_wod_json = dspy.InputField(
 		desc="JSON from Scaling & Injury Specialist.",
@@ -102,54 +359,199 @@ class PerformanceOptimizerSignature(dspy.Signature):
 	goals = dspy.InputField(
 		desc="List of user goals like ['improve cardio', 'build leg strength'] (as JSON string).",
 	)
-	plan_json = dspy.OutputField(
-		desc="Output only strict JSON: {warmup, wod, cooldown, accessories: [..]} with actionable details.",
+	warmup_cooldown_json = dspy.OutputField(
+		desc="Output only strict JSON: {warmup, cooldown} with actionable details.",
+	)
+
+
+# =========================
+# Batch signatures
+# =========================
+# One LM call per stage for N inputs. Inputs are numbered / carry "i" and the
+# output is a JSON array aligned by that index, so results can be dispatched
+# back to each input even if the LM reorders them.
+
+
+class BatchUserIntentSignature(dspy.Signature):
+	"""Normalize several vague user requests into structured CrossFit-related workout intents, one per request."""
+
+	raw_requests = dspy.InputField(
+		desc="Numbered free-text user inputs, one per line: '[i] request'.",
+	)
+	intents_json = dspy.OutputField(
+		desc=(
+			"Output only a strict JSON array with one intent per request, aligned by index, e.g. "
+			'[{"i": 0, "type": "Light-duty", "duration": 15, "style": "EMOM"}, '
+			'{"i": 1, "type": "Heavy lifting", "duration": 45, "style": "Strength"}]'
+		),
 	)
 
 
+class BatchWODArchitectSignature(dspy.Signature):
+	"""Generate one structured CrossFit workout per structured intent. Output strict JSON objects with fields: i, name, type, movements (list of objects with exercise and a unit like reps, time, or calories)."""
+
+	requests_json = dspy.InputField(
+		desc='JSON array of {"i": index, "request": intent} from the User Intent Agent.',
+	)
+	workouts_json = dspy.OutputField(
+		desc="Output only a strict JSON array, one per request: [{i, name, type, movements}].",
+	)
+
+
+class BatchScalingInjurySignature(dspy.Signature):
+	"""Annotate each base WOD with scaling and rx_plus options and safe alternatives for its injury."""
+
+	items_json = dspy.InputField(
+		desc='JSON array of {"i": index, "base_wod_json": {name, type, movements}, "injury": text (may be empty)}.',
+	)
+	annotated_wods_json = dspy.OutputField(
+		desc="Output only a strict JSON array, one per item: the same WOD plus i and, for each movement: scaled, rx_plus, injury_alts when needed.",
+	)
+
+
+class BatchAccessoryGoalsSignature(dspy.Signature):
+	"""Provide two accessory sessions per base WOD that complement it and are aligned to its user goals."""
+
+	items_json = dspy.InputField(
+		desc='JSON array of {"i": index, "base_wod_json": {name, type, movements}, "goals": [..]}.',
+	)
+	accessory_plans_json = dspy.OutputField(
+		desc="Output only a strict JSON array, one per item: [{i, accessories: [..]}] with two sessions each.",
+	)
+
+
+class BatchMergeSignature(dspy.Signature):
+	"""Provide a warm-up and cool-down for each annotated WOD, aligned to its user goals."""
+
+	items_json = dspy.InputField(
+		desc='JSON array of {"i": index, "modified_wod_json": {..}, "goals": [..]}.',
+	)
+	warmups_cooldowns_json = dspy.OutputField(
+		desc="Output only a strict JSON array, one per item: [{i, warmup, cooldown}] with actionable details.",
+	)
+
+
+# =========================
+# Agents
+# =========================
+
+INTENT_MAX_TOKENS: int = 128
+ARCHITECT_MAX_TOKENS: int = 512
+SCALER_MAX_TOKENS: int = 768
+ACCESSORIES_MAX_TOKENS: int = 512
+OPTIMIZER_MAX_TOKENS: int = 384
+REASONING_MAX_TOKENS: int = 256
+
+
+def _budget(per_item: int, size: int = 1, reasoning: bool = False) -> int:
+	return per_item * size + (REASONING_MAX_TOKENS if reasoning else 0)
+
+
+def _make_predictor(signature: type, chain_of_thought: bool = False, max_tokens: int | None = None) -> dspy.Module:
+	# Each agent instance builds its own predictors: they hold mutable state (demos,
+	# instructions set by load() or an optimizer), so sharing them across workflow
+	# instances would leak one instance's state into the others.
+	module_cls = dspy.ChainOfThought if chain_of_thought else dspy.Predict
+	config = {} if max_tokens is None else {"max_tokens": max_tokens}
+	return module_cls(signature, **config)
+
+
+def _batch_program(agent: dspy.Module, signature: type, chain_of_thought: bool = False) -> Callable[..., dspy.Prediction]:
+	"""
+	Returns the agent's cached batch program, building it (and its predictor) on first
+	use, so agents that only serve single requests never construct batch predictors.
+	"""
+	if agent.batch_program is None:
+		agent.batch_predictor = _make_predictor(signature, chain_of_thought=chain_of_thought)
+		agent.batch_program = cached_predict(signature)(agent.batch_predictor)
+	return agent.batch_program
+
+
 class UserIntentAgent(dspy.Module):
-	def __init__(self, debug: bool = False):
+	def __init__(self, debug: bool = False, lm: dspy.LM | None = None):
 		super().__init__()
 		self.signature = UserIntentSignature
 		self.debug = debug
-		self.program = dspy.Predict(UserIntentSignature)
+		# Optional LM for this agent only (e.g. a smaller model); defaults to the configured one
+		self.lm = lm
+		self.predictor = _make_predictor(UserIntentSignature, max_tokens=INTENT_MAX_TOKENS)
+		self.program = cached_predict(UserIntentSignature)(self.predictor)
+		# Built on first forward_batch(), see _batch_program()
+		self.batch_predictor = None
+		self.batch_program = None
 
 	def forward(self, raw_request: str) -> Dict[str, Any]:
+		return self._run(raw_request=raw_request)
+
+	async def aforward(self, raw_request: str) -> Dict[str, Any]:
+		return await dspy.asyncify(self._run)(raw_request=raw_request)
+
+	def _run(self, raw_request: str) -> Dict[str, Any]:
 		if self.debug:
 			print("=== USER INTENT INPUT REQUEST ===")
 			print(raw_request)
 
-		pred = self.program(raw_request=raw_request)
-		raw = str(getattr(pred, "intent_json", ""))
+		_, raw, parsed = _predict_validated(
+			"UserIntentAgent", self.program, "intent_json", IntentModel, self.lm,
+			{"raw_request": raw_request},
+		)
 
 		if self.debug:
 			print("=== USER INTENT RAW OUTPUT (TEXT) ===")
 			print(raw)
 
-		parsed = _parse_json_dict(raw)
-		if parsed is not None:
-			return parsed
+		return parsed
 
-		return {
-			"raw_request": raw_request,
-			"raw_intent_json": raw,
-		}
+	def forward_batch(self, raw_requests: List[str]) -> List[Dict[str, Any]]:
+		if not raw_requests:
+			return []
+
+		payload = "\n".join(f"[{i}] {r}" for i, r in enumerate(raw_requests))
+
+		if self.debug:
+			print("=== USER INTENT BATCH INPUT REQUESTS ===")
+			print(payload)
+
+		with dspy.context(lm=self.lm or dspy.settings.lm):
+			pred = _batch_program(self, BatchUserIntentSignature)(
+				raw_requests=payload,
+				config={"max_tokens": _budget(INTENT_MAX_TOKENS, len(raw_requests))},
+			)
+		raw = _field(pred, "intents_json")
+
+		if self.debug:
+			print("=== USER INTENT BATCH RAW OUTPUT (TEXT) ===")
+			print(raw)
+
+		intents = _parse_json_batch(raw, len(raw_requests), IntentModel)
+		store_validated(pred)
+		return intents
 
 
 class WODArchitect(dspy.Module):
-	def __init__(self, debug: bool = False):
+	def __init__(self, debug: bool = False, lm: dspy.LM | None = None):
 		super().__init__()
 		self.signature = WODArchitectSignature
 		self.debug = debug
-		self.program = dspy.Predict(WODArchitectSignature)
+		self.lm = lm
+		self.predictor = _make_predictor(WODArchitectSignature, max_tokens=ARCHITECT_MAX_TOKENS)
+		self.program = cached_predict(WODArchitectSignature)(self.predictor)
+		self.batch_predictor = None
+		self.batch_program = None
 
 	def forward(self, request: Any) -> Dict[str, Any]:
 		"""
 		Accepts the structured intent from the User Intent Agent (dict or JSON string).
-		Serializes dicts to JSON so the LM sees a consistent schema.
+		Dicts reach the LM as JSON (see _lm_input) so it sees a consistent schema.
 		"""
+		return self._run(request=request)
+
+	async def aforward(self, request: Any) -> Dict[str, Any]:
+		return await dspy.asyncify(self._run)(request=request)
+
+	def _run(self, request: Any) -> Dict[str, Any]:
 		if isinstance(request, dict):
-			intent_payload = json.dumps(request)
+			intent_payload = _lm_input(request)
 		else:
 			intent_payload = str(request)
 
@@ -157,104 +559,375 @@ class WODArchitect(dspy.Module):
 			print("=== WOD ARCHITECT INPUT REQUEST ===")
 			print(intent_payload)
 
-		pred = self.program(request=intent_payload)
-
-		raw = str(getattr(pred, "workout_json", ""))
+		_, raw, parsed = _predict_validated(
+			"WODArchitect", self.program, "workout_json", WODModel, self.lm,
+			{"request": intent_payload},
+		)
 
 		if self.debug:
 			print("=== WOD ARCHITECT RAW OUTPUT (TEXT) ===")
 			print(raw)
 
-		parsed = _parse_json_dict(raw)
-		if parsed is not None:
-			return parsed
+		return parsed
+
+	def forward_batch(self, requests: List[Any]) -> List[Dict[str, Any]]:
+		if not requests:
+			return []
+
+		payload = _dumps([{"i": i, "request": r} for i, r in enumerate(requests)])
+
+		if self.debug:
+			print("=== WOD ARCHITECT BATCH INPUT REQUESTS ===")
+			print(payload)
+
+		with dspy.context(lm=self.lm or dspy.settings.lm):
+			pred = _batch_program(self, BatchWODArchitectSignature)(
+				requests_json=payload,
+				config={"max_tokens": _budget(ARCHITECT_MAX_TOKENS, len(requests))},
+			)
+		raw = _field(pred, "workouts_json")
+
+		if self.debug:
+			print("=== WOD ARCHITECT BATCH RAW OUTPUT (TEXT) ===")
+			print(raw)
+
+		workouts = _parse_json_batch(raw, len(requests), WODModel)
+		store_validated(pred)
+		return workouts
 
-		return {
-			"request": request,
-			"raw_workout_json": raw,
-		}
+
+# Generic scaling options used when there is no injury to reason about
+_DEFAULT_SCALED: str = "Reduce load/reps by ~30%"
+_DEFAULT_RX_PLUS: str = "Add weight, reps, or a tempo"
+
+
+def _annotate_without_injury(base_wod_json: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Deterministic annotation for the no-injury case: the same WOD with default
+	scaled / rx_plus options on each movement. Returns new dicts; the base WOD is
+	shared with the other stages and must not be mutated.
+	"""
+	movements = [
+		{"scaled": _DEFAULT_SCALED, "rx_plus": _DEFAULT_RX_PLUS, **movement}
+		for movement in base_wod_json.get("movements", [])
+		if isinstance(movement, dict)
+	]
+	return {**base_wod_json, "movements": movements}
 
 
 class ScalingInjurySpecialist(dspy.Module):
-	def __init__(self, debug: bool = False):
+	def __init__(self, debug: bool = False, lm: dspy.LM | None = None):
 		super().__init__()
 		self.signature = ScalingInjurySignature
 		self.debug = debug
-		self.program = dspy.ChainOfThought(ScalingInjurySignature)
+		self.lm = lm
+		self.predictor = _make_predictor(
+			ScalingInjurySignature, chain_of_thought=debug, max_tokens=_budget(SCALER_MAX_TOKENS, reasoning=debug)
+		)
+		self.program = cached_predict(ScalingInjurySignature)(self.predictor)
+		self.batch_predictor = None
+		self.batch_program = None
 
 	def forward(self, base_wod_json: Dict[str, Any], injury: str) -> Dict[str, Any]:
-		base_wod_str = json.dumps(base_wod_json)
+		return self._run(base_wod_json=base_wod_json, injury=injury)
+
+	async def aforward(self, base_wod_json: Dict[str, Any], injury: str) -> Dict[str, Any]:
+		return await dspy.asyncify(self._run)(base_wod_json=base_wod_json, injury=injury)
+
+	def _run(self, base_wod_json: Dict[str, Any], injury: str) -> Dict[str, Any]:
 		injury_text = injury or ""
 
+		if not injury_text.strip():
+			# Nothing injury-specific to reason about: skip the LM call
+			annotated = _annotate_without_injury(base_wod_json)
+			if self.debug:
+				print("=== SCALER / NO INJURY, DEFAULT SCALING ===")
+				print(annotated)
+			return annotated
+
+		base_wod_payload = _lm_input(base_wod_json)
+
 		if self.debug:
 			print("=== SCALER / DSPy INPUTS ===")
-			print({"base_wod_json": base_wod_str, "injury": injury_text})
-
-		pred = self.program(base_wod_json=base_wod_str, injury=injury_text)
+			print({"base_wod_json": base_wod_payload, "injury": injury_text})
 
-		raw = str(getattr(pred, "annotated_wod_json", ""))
+		pred, raw, parsed = _predict_validated(
+			"ScalingInjurySpecialist", self.program, "annotated_wod_json", AnnotatedWODModel, self.lm,
+			{"base_wod_json": base_wod_payload, "injury": injury_text},
+		)
 
 		if self.debug:
 			print("=== SCALER / DSPy RAW OUTPUT ===")
 			print(raw)
 			print("PRED-injury")
-			print(pred.toDict().keys())
+			print(list(pred.keys()))
+			if hasattr(pred, "reasoning"):
+				print("--- Reasoning ---")
+				print(pred.reasoning)
+
+		return parsed
+
+	def forward_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+		"""
+		Batched forward over (base_wod_json, injury) pairs. Pairs without an injury
+		are annotated locally; only the others are sent to the LM.
+		"""
+		results: List[Dict[str, Any] | None] = [None] * len(items)
+		pending: List[int] = []
+		for i, (base_wod, injury) in enumerate(items):
+			if (injury or "").strip():
+				pending.append(i)
+			else:
+				results[i] = _annotate_without_injury(base_wod)
+
+		if not pending:
+			return results
+
+		payload = _dumps([
+			{"i": j, "base_wod_json": items[i][0], "injury": items[i][1]}
+			for j, i in enumerate(pending)
+		])
+
+		if self.debug:
+			print("=== SCALER / DSPy BATCH INPUTS ===")
+			print(payload)
+
+		with dspy.context(lm=self.lm or dspy.settings.lm):
+			pred = _batch_program(self, BatchScalingInjurySignature, chain_of_thought=self.debug)(
+				items_json=payload,
+				config={"max_tokens": _budget(SCALER_MAX_TOKENS, len(pending), reasoning=self.debug)},
+			)
+		raw = _field(pred, "annotated_wods_json")
+
+		if self.debug:
+			print("=== SCALER / DSPy BATCH RAW OUTPUT ===")
+			print(raw)
+			if hasattr(pred, "reasoning"):
+				print("--- Reasoning ---")
+				print(pred.reasoning)
+
+		annotated_wods = _parse_json_batch(raw, len(pending), AnnotatedWODModel)
+		store_validated(pred)
+		for i, annotated in zip(pending, annotated_wods):
+			results[i] = annotated
+		return results
+
+
+class AccessoryPlanner(dspy.Module):
+	def __init__(self, debug: bool = False, lm: dspy.LM | None = None):
+		super().__init__()
+		self.signature = AccessoryGoalsSignature
+		self.debug = debug
+		self.lm = lm
+		self.predictor = _make_predictor(
+			AccessoryGoalsSignature, chain_of_thought=debug, max_tokens=_budget(ACCESSORIES_MAX_TOKENS, reasoning=debug)
+		)
+		self.program = cached_predict(AccessoryGoalsSignature)(self.predictor)
+		self.batch_predictor = None
+		self.batch_program = None
+
+	def forward(self, base_wod_json: Dict[str, Any], goals: str | List[str]) -> Dict[str, Any]:
+		return self._run(base_wod_json=base_wod_json, goals=goals)
+
+	async def aforward(self, base_wod_json: Dict[str, Any], goals: str | List[str]) -> Dict[str, Any]:
+		return await dspy.asyncify(self._run)(base_wod_json=base_wod_json, goals=goals)
+
+	def _run(self, base_wod_json: Dict[str, Any], goals: str | List[str]) -> Dict[str, Any]:
+		base_wod_payload = _lm_input(base_wod_json)
+
+		parsed_goals = _goals_input(goals)
+
+		if self.debug:
+			print("=== ACCESSORIES / DSPy INPUTS ===")
+			print({"base_wod_json": base_wod_payload, "goals": parsed_goals})
+
+		pred, raw, parsed = _predict_validated(
+			"AccessoryPlanner", self.program, "accessories_json", AccessoriesModel, self.lm,
+			{"base_wod_json": base_wod_payload, "goals": parsed_goals},
+		)
+
+		if self.debug:
+			print("=== ACCESSORIES / DSPy RAW OUTPUT ===")
+			print(raw)
+			print("PRED-Accessories")
+			print(list(pred.keys()))
 			if hasattr(pred, "reasoning"):
 				print("--- Reasoning ---")
 				print(pred.reasoning)
 
-		parsed = _parse_json_dict(raw)
-		if parsed is not None:
-			return parsed
+		return parsed
+
+	def forward_batch(self, items: List[Tuple[Dict[str, Any], str | List[str]]]) -> List[Dict[str, Any]]:
+		"""
+		Batched forward over (base_wod_json, goals) pairs.
+		"""
+		if not items:
+			return []
+
+		payload = _dumps([
+			{"i": i, "base_wod_json": base_wod, "goals": goals}
+			for i, (base_wod, goals) in enumerate(items)
+		])
+
+		if self.debug:
+			print("=== ACCESSORIES / DSPy BATCH INPUTS ===")
+			print(payload)
+
+		with dspy.context(lm=self.lm or dspy.settings.lm):
+			pred = _batch_program(self, BatchAccessoryGoalsSignature, chain_of_thought=self.debug)(
+				items_json=payload,
+				config={"max_tokens": _budget(ACCESSORIES_MAX_TOKENS, len(items), reasoning=self.debug)},
+			)
+		raw = _field(pred, "accessory_plans_json")
 
-		return {
-			"base_wod_json": base_wod_json,
-			"injury": injury_text,
-			"raw_annotated_wod_json": raw,
-		}
+		if self.debug:
+			print("=== ACCESSORIES / DSPy BATCH RAW OUTPUT ===")
+			print(raw)
+			if hasattr(pred, "reasoning"):
+				print("--- Reasoning ---")
+				print(pred.reasoning)
+
+		accessory_plans = _parse_json_batch(raw, len(items), AccessoriesModel)
+		store_validated(pred)
+		return accessory_plans
+
+
+def _assemble_plan(
+	warmup_cooldown: Dict[str, Any], modified_wod_json: Dict[str, Any], accessories: Dict[str, Any]
+) -> Dict[str, Any]:
+	"""
+	Builds the final plan from the LM's warm-up/cool-down and the previous stages'
+	outputs, which are attached as-is instead of being regenerated by the LM.
+	Keys missing from `warmup_cooldown` (e.g. a partial streamed snapshot) are left out.
+	"""
+	plan: Dict[str, Any] = {}
+	if "warmup" in warmup_cooldown:
+		plan["warmup"] = warmup_cooldown["warmup"]
+	plan["wod"] = modified_wod_json
+	if "cooldown" in warmup_cooldown:
+		plan["cooldown"] = warmup_cooldown["cooldown"]
+	plan["accessories"] = accessories.get("accessories", [])
+	return plan
 
 
 class PerformanceOptimizer(dspy.Module):
-	def __init__(self, debug: bool = False):
+	def __init__(self, debug: bool = False, lm: dspy.LM | None = None):
 		super().__init__()
-		self.signature = PerformanceOptimizerSignature
+		self.signature = MergeSignature
 		self.debug = debug
-		self.program = dspy.ChainOfThought(PerformanceOptimizerSignature)
+		self.lm = lm
+		self.predictor = _make_predictor(MergeSignature, max_tokens=OPTIMIZER_MAX_TOKENS)
+		self.program = cached_predict(MergeSignature)(self.predictor)
+		self.batch_predictor = None
+		self.batch_program = None
+
+	def forward(
+		self, modified_wod_json: Dict[str, Any], accessories: Dict[str, Any], goals: str | List[str]
+	) -> Dict[str, Any]:
+		"""
+		Merges the annotated WOD with the accessory plan. Only the warm-up and cool-down
+		are generated by the LM (aligned to `goals`); the WOD and accessories are
+		attached in Python.
+		"""
+		return self._run(modified_wod_json=modified_wod_json, accessories=accessories, goals=goals)
 
-	def forward(self, modified_wod_json: Dict[str, Any], goals: str | List[str]) -> Dict[str, Any]:
-		modified_wod_str = json.dumps(modified_wod_json)
+	async def aforward(
+		self, modified_wod_json: Dict[str, Any], accessories: Dict[str, Any], goals: str | List[str]
+	) -> Dict[str, Any]:
+		return await dspy.asyncify(self._run)(
+			modified_wod_json=modified_wod_json, accessories=accessories, goals=goals
+		)
 
-		if isinstance(goals, list):
-			parsed_goals = json.dumps(goals)
-		else:
-			parsed_goals = str(goals)
+	def _run(
+		self, modified_wod_json: Dict[str, Any], accessories: Dict[str, Any], goals: str | List[str]
+	) -> Dict[str, Any]:
+		modified_wod_payload = _lm_input(modified_wod_json)
+		parsed_goals = _goals_input(goals)
 
 		if self.debug:
 			print("=== OPTIMIZER / DSPy INPUTS ===")
-			print({"modified_wod_json": modified_wod_str, "goals": parsed_goals})
+			print({"modified_wod_json": modified_wod_payload, "goals": parsed_goals})
+
+		_, raw_output, parsed = _predict_validated(
+			"PerformanceOptimizer", self.program, "warmup_cooldown_json", WarmupCooldownModel, self.lm,
+			{"modified_wod_json": modified_wod_payload, "goals": parsed_goals},
+		)
+
+		if self.debug:
+			print("=== OPTIMIZER / DSPy RAW OUTPUT ===")
+			print(raw_output)
 
-		pred = self.program(modified_wod_json=modified_wod_str, goals=parsed_goals)
+		return _assemble_plan(parsed, modified_wod_json, accessories)
 
-		raw_output = str(getattr(pred, "plan_json", ""))
+	async def forward_stream(
+		self, modified_wod_json: Dict[str, Any], accessories: Dict[str, Any], goals: str | List[str]
+	) -> AsyncIterator[Dict[str, Any]]:
+		"""
+		Streaming version of forward(): yields best-effort partial plans as the warm-up
+		and then the cool-down are generated, then the final plan.
+		"""
+		stream_program = dspy.streamify(
+			self.predictor,
+			stream_listeners=[dspy.streaming.StreamListener(signature_field_name="warmup_cooldown_json")],
+		)
+		parser = IncrementalJsonParser()
+		pred = None
+
+		async for value in stream_program(
+			modified_wod_json=_lm_input(modified_wod_json),
+			goals=_goals_input(goals),
+			lm=self.lm,
+		):
+			if isinstance(value, dspy.Prediction):
+				pred = value
+			elif isinstance(value, dspy.streaming.StreamResponse):
+				partial = parser.feed(value.chunk)
+				if partial is not None:
+					yield _assemble_plan(partial, modified_wod_json, accessories)
+
+		yield _assemble_plan(self._parse_warmup_cooldown(pred), modified_wod_json, accessories)
+
+	def _parse_warmup_cooldown(self, pred: dspy.Prediction | None) -> Dict[str, Any]:
+		raw_output = _field(pred, "warmup_cooldown_json")
 
 		if self.debug:
 			print("=== OPTIMIZER / DSPy RAW OUTPUT ===")
 			print(raw_output)
-			print("PRED-Optimizer")
-			print(pred.toDict().keys())
-			if hasattr(pred, "reasoning"):
-				print("--- Reasoning ---")
-				print(pred.reasoning)
 
-		parsed = _parse_json_dict(raw_output)
-		if parsed is not None:
-			return parsed
+		return _parse_model(WarmupCooldownModel, raw_output)
 
-		return {
-			"modified_wod_json": modified_wod_json,
-			"goals": goals,
-			"raw_plan_json": raw_output,
-		}
+	def forward_batch(
+		self, items: List[Tuple[Dict[str, Any], Dict[str, Any], str | List[str]]]
+	) -> List[Dict[str, Any]]:
+		"""
+		Batched forward over (modified_wod_json, accessories, goals) triples.
+		"""
+		if not items:
+			return []
 
+		payload = _dumps([
+			{"i": i, "modified_wod_json": modified_wod, "goals": goals}
+			for i, (modified_wod, _, goals) in enumerate(items)
+		])
+
+		if self.debug:
+			print("=== OPTIMIZER / DSPy BATCH INPUTS ===")
+			print(payload)
 
+		with dspy.context(lm=self.lm or dspy.settings.lm):
+			pred = _batch_program(self, BatchMergeSignature)(
+				items_json=payload,
+				config={"max_tokens": _budget(OPTIMIZER_MAX_TOKENS, len(items))},
+			)
+		raw_output = _field(pred, "warmups_cooldowns_json")
+
+		if self.debug:
+			print("=== OPTIMIZER / DSPy BATCH RAW OUTPUT ===")
+			print(raw_output)
 
+		warmups_cooldowns = _parse_json_batch(raw_output, len(items), WarmupCooldownModel)
+		store_validated(pred)
+		return [
+			_assemble_plan(warmup_cooldown, modified_wod, accessories)
+			for warmup_cooldown, (modified_wod, accessories, _) in zip(warmups_cooldowns, items)
+		]
@@ -1,7 +1,12 @@
+import json
+import logging
 import os
 import sys
+from typing import Any, Dict
 from dotenv import load_dotenv
 import dspy
+import httpx
+import litellm
 from workflow import SmartWODWorkflow
 
 
@@ -15,27 +20,68 @@ USER_CONTEXT: dict = {
 # Default model and debug mode
 DEFAULT_DEBUG: bool = False
 DEFAULT_MODEL: str = "gpt-4o-mini"
+# Smaller/faster model for the User Intent Agent, which only normalizes free text
+# into {type, duration, style}
+DEFAULT_INTENT_MODEL: str = "gpt-4.1-nano"
+DEFAULT_INTENT_MAX_TOKENS: int = 128
+# Max concurrent LM calls when the workflow runs async (SmartWODWorkflow.aforward)
+DEFAULT_ASYNC_MAX_WORKERS: int = 16
+# Keep-alive pool shared by the sync LM calls (forward, and aforward's worker threads),
+# so the stages reuse TCP+TLS connections. No async client is set: an httpx.AsyncClient
+# binds to the first event loop that uses it, and litellm already pools for stream().
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS: int = 32
+DEFAULT_KEEPALIVE_EXPIRY: float = 120.0
 
 
-def main() -> int:
-	load_dotenv()
-	if not os.getenv("OPENAI_API_KEY"):
-		sys.stderr.write("ERROR: OPENAI_API_KEY is not set in environment.\n")
-		return 1
+def _configure_http_clients() -> None:
+	limits = httpx.Limits(
+		max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+		keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+	)
+	litellm.client_session = httpx.Client(limits=limits)
 
+
+def _configure_lm() -> None:
 	lm = dspy.LM(
-		model=f"openai/{DEFAULT_MODEL}", 
+		model=f"openai/{DEFAULT_MODEL}",
 		model_type="chat",
 		api_key=os.getenv("OPENAI_API_KEY"),
 		temperature=0
 		)
-	dspy.configure(lm=lm)
+	dspy.configure(lm=lm, async_max_workers=DEFAULT_ASYNC_MAX_WORKERS)
+
+
+load_dotenv()
+_configure_http_clients()
+if dspy.settings.lm is None:
+	_configure_lm()
+
+INTENT_LM = dspy.LM(
+	model=f"openai/{DEFAULT_INTENT_MODEL}",
+	model_type="chat",
+	api_key=os.getenv("OPENAI_API_KEY"),
+	temperature=0,
+	max_tokens=DEFAULT_INTENT_MAX_TOKENS,
+	)
 
-	workflow = SmartWODWorkflow(debug=DEFAULT_DEBUG)
-	result = workflow(request=USER_REQUEST, context=USER_CONTEXT)
+# Built once at import and reused by every run() call (e.g. from a server route),
+# instead of rebuilding the agents per request.
+WORKFLOW = SmartWODWorkflow(debug=DEFAULT_DEBUG, intent_lm=INTENT_LM)
+
+
+def run(request: str, context: Dict[str, Any]) -> Dict[str, Any]:
+	"""Runs the workflow for one request/context and returns the final plan."""
+	result = WORKFLOW(request=request, context=context)
+	return getattr(result, "plan", result)
+
+
+def main() -> int:
+	logging.basicConfig(level=logging.WARNING)
+	if not os.getenv("OPENAI_API_KEY"):
+		sys.stderr.write("ERROR: OPENAI_API_KEY is not set in environment.\n")
+		return 1
 
-	import json
-	plan = getattr(result, "plan", result)
+	plan = run(USER_REQUEST, USER_CONTEXT)
 	print(json.dumps(plan, indent=2))
 	return 0
 
@@ -1,4 +1,7 @@
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import asyncio
+import contextvars
 import json
 import dspy
 
@@ -6,22 +9,39 @@ from functions import (
 	UserIntentAgent,
 	WODArchitect,
 	ScalingInjurySpecialist,
+	AccessoryPlanner,
 	PerformanceOptimizer,
 )
 
 
+# Pairs per LM call in forward_batch(). Keeps each stage's output budget (per-item
+# max_tokens x batch size) well under the model's output cap, and limits a malformed
+# item to failing its own sub-batch.
+BATCH_SIZE: int = 6
+
+
+def _context_fields(context: Dict[str, Any]) -> Tuple[str, List[str]]:
+	injury = context.get("injury", "") if isinstance(context, dict) else ""
+	goals: List[str] = context.get("goals", []) if isinstance(context, dict) else []
+	return injury, goals
+
+
 class SmartWODWorkflow(dspy.Module):
-	def __init__(self, debug: bool = False):
+	def __init__(self, debug: bool = False, intent_lm: dspy.LM | None = None):
+		"""
+		`intent_lm` routes the (small, classification-like) intent normalization to its own
+		LM, e.g. a smaller/faster model; the other stages use the configured LM.
+		"""
 		super().__init__()
 		self.debug = debug
-		self.intent = UserIntentAgent(debug=debug)
+		self.intent = UserIntentAgent(debug=debug, lm=intent_lm)
 		self.architect = WODArchitect(debug=debug)
 		self.scaler = ScalingInjurySpecialist(debug=debug)
+		self.accessories = AccessoryPlanner(debug=debug)
 		self.optimizer = PerformanceOptimizer(debug=debug)
 
 	def forward(self, request: str, context: Dict[str, Any]) -> dspy.Prediction:
-		injury = context.get("injury", "") if isinstance(context, dict) else ""
-		goals: List[str] = context.get("goals", []) if isinstance(context, dict) else []
+		injury, goals = _context_fields(context)
 
 		# 1) Normalize the raw request into a structured intent
 		user_intent = self.intent(raw_request=request)
@@ -29,15 +49,132 @@ class SmartWODWorkflow(dspy.Module):
 		# 2) Generate the base WOD
 		base_wod = self.architect(request=user_intent)
 
-		# 3) Apply scaling and injury logic
-		annotated = self.scaler(base_wod_json=base_wod, injury=injury)
+		# 3) Apply scaling and injury logic, and plan goal-aligned accessories.
+		#    Both only depend on the base WOD, so their LM calls run concurrently.
+		#    Each task gets its own copy of the current context so any dspy.context()
+		#    overrides (lm, adapter, ...) are visible in the worker threads.
+		with ThreadPoolExecutor(max_workers=2) as pool:
+			annotated_future = pool.submit(
+				contextvars.copy_context().run, self.scaler, base_wod_json=base_wod, injury=injury
+			)
+			accessories_future = pool.submit(
+				contextvars.copy_context().run, self.accessories, base_wod_json=base_wod, goals=goals
+			)
+			annotated = annotated_future.result()
+			accessories = accessories_future.result()
 
-		# 4) Optimize performance (warm-up, cool-down, +2 accessories)
-		plan = self.optimizer(modified_wod_json=annotated, goals=goals)
+		# 4) Generate warm-up and cool-down and assemble the final plan (+2 accessories)
+		plan = self.optimizer(modified_wod_json=annotated, accessories=accessories, goals=goals)
 
 		return dspy.Prediction(
 			intent=user_intent,
 			base_wod=base_wod,
 			annotated_wod=annotated,
+			accessories=accessories,
 			plan=plan,
 		)
+
+	async def aforward(self, request: str, context: Dict[str, Any]) -> dspy.Prediction:
+		"""
+		Async version of forward(): each stage's LM call runs in DSPy's async worker pool,
+		so the event loop can serve other requests while waiting on the LM.
+		"""
+		injury, goals = _context_fields(context)
+
+		user_intent = await self.intent.acall(raw_request=request)
+		base_wod = await self.architect.acall(request=user_intent)
+
+		# Scaling/injury and accessories only depend on the base WOD
+		annotated, accessories = await asyncio.gather(
+			self.scaler.acall(base_wod_json=base_wod, injury=injury),
+			self.accessories.acall(base_wod_json=base_wod, goals=goals),
+		)
+
+		plan = await self.optimizer.acall(modified_wod_json=annotated, accessories=accessories, goals=goals)
+
+		return dspy.Prediction(
+			intent=user_intent,
+			base_wod=base_wod,
+			annotated_wod=annotated,
+			accessories=accessories,
+			plan=plan,
+		)
+
+	async def stream(self, request: str, context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any] | dspy.Prediction]:
+		"""
+		Like aforward(), but streams the final stage: yields partial plan dicts as the
+		Performance Optimizer generates them, then the full dspy.Prediction.
+		"""
+		injury, goals = _context_fields(context)
+
+		user_intent = await self.intent.acall(raw_request=request)
+		base_wod = await self.architect.acall(request=user_intent)
+
+		annotated, accessories = await asyncio.gather(
+			self.scaler.acall(base_wod_json=base_wod, injury=injury),
+			self.accessories.acall(base_wod_json=base_wod, goals=goals),
+		)
+
+		plan: Dict[str, Any] = {}
+		async for plan in self.optimizer.forward_stream(
+			modified_wod_json=annotated, accessories=accessories, goals=goals
+		):
+			yield plan
+
+		yield dspy.Prediction(
+			intent=user_intent,
+			base_wod=base_wod,
+			annotated_wod=annotated,
+			accessories=accessories,
+			plan=plan,
+		)
+
+	def forward_batch(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[dspy.Prediction]:
+		"""
+		Runs N (request, context) pairs through the pipeline with one LM call per stage
+		per sub-batch of BATCH_SIZE pairs, instead of one per stage and request. Returns
+		one dspy.Prediction per pair, in order.
+		"""
+		results: List[dspy.Prediction] = []
+		for start in range(0, len(items), BATCH_SIZE):
+			results.extend(self._forward_sub_batch(items[start:start + BATCH_SIZE]))
+		return results
+
+	def _forward_sub_batch(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[dspy.Prediction]:
+		requests = [request for request, _ in items]
+		contexts = [_context_fields(context) for _, context in items]
+
+		user_intents = self.intent.forward_batch(requests)
+		base_wods = self.architect.forward_batch(user_intents)
+
+		with ThreadPoolExecutor(max_workers=2) as pool:
+			annotated_future = pool.submit(
+				contextvars.copy_context().run,
+				self.scaler.forward_batch,
+				[(base_wod, injury) for base_wod, (injury, _) in zip(base_wods, contexts)],
+			)
+			accessories_future = pool.submit(
+				contextvars.copy_context().run,
+				self.accessories.forward_batch,
+				[(base_wod, goals) for base_wod, (_, goals) in zip(base_wods, contexts)],
+			)
+			annotated_wods = annotated_future.result()
+			accessories_plans = accessories_future.result()
+
+		plans = self.optimizer.forward_batch([
+			(annotated, accessories, goals)
+			for annotated, accessories, (_, goals) in zip(annotated_wods, accessories_plans, contexts)
+		])
+
+		return [
+			dspy.Prediction(
+				intent=user_intent,
+				base_wod=base_wod,
+				annotated_wod=annotated,
+				accessories=accessories,
+				plan=plan,
+			)
+			for user_intent, base_wod, annotated, accessories, plan in zip(
+				user_intents, base_wods, annotated_wods, accessories_plans, plans
+			)
+		]